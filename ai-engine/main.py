@@ -1,24 +1,83 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, TypedDict
 import os
+import sys
 import asyncio
 import asyncpg
 import logging
-from datetime import datetime
-import numpy as np
+from datetime import datetime, timezone
 from contextlib import asynccontextmanager
-import json
+from cachetools import TTLCache
 from models.simple_risk_analyzer import SimpleRiskAnalyzer
-from models.blacklist_checker import BlacklistChecker
+from models.blacklist_checker import DEFAULT_BLACKLIST_CHECKER
 from models.risk_analyzer_base import RiskAnalyzerBase
-from config import settings
+from config import get_settings
+
+settings = get_settings()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# User history cache: short TTL so bursty repeat analyses for the same user
+# reuse the last DB aggregation instead of re-running it
+USER_HISTORY_CACHE_SIZE = 50_000
+USER_HISTORY_CACHE_TTL_SECONDS = 30
+
+# Database pool sizing: connections established eagerly at startup so the
+# first requests after deploy do not pay the TCP/TLS handshake; max_size
+# covers bursts across the analyze/profile/blacklist endpoints
+POOL_MIN_SIZE = 4
+POOL_MAX_SIZE = 20
+POOL_COMMAND_TIMEOUT_SECONDS = 10
+POOL_ACQUIRE_TIMEOUT_SECONDS = 2.0
+
+# Per-connection prepared statement cache (asyncpg keys it by query text,
+# so hot queries must be issued from shared constants)
+STATEMENT_CACHE_SIZE = 100
+
+# User history aggregation. Module-level constant so every call passes the
+# identical query text and reuses the cached server-side plan.
+USER_HISTORY_SQL = """
+SELECT
+    COUNT(*) as total_transactions,
+    COALESCE(SUM(amount_in), 0) as total_volume,
+    COALESCE(AVG(amount_in), 0) as avg_transaction_size,
+    COALESCE(MAX(created_at), NOW()) as last_transaction,
+    COALESCE(MIN(created_at), NOW()) as first_transaction,
+    COUNT(CASE WHEN risk_score > 0.5 THEN 1 END) as high_risk_count
+FROM transactions
+WHERE user_id = $1
+    AND created_at > NOW() - INTERVAL '30 days'
+    AND status IN ('completed', 'confirmed')
+"""
+
+# Batched variant for /api/risk/analyze/batch: one round-trip aggregates
+# histories for every distinct user in the batch
+USER_HISTORY_BATCH_SQL = """
+SELECT
+    user_id,
+    COUNT(*) as total_transactions,
+    COALESCE(SUM(amount_in), 0) as total_volume,
+    COALESCE(AVG(amount_in), 0) as avg_transaction_size,
+    COALESCE(MAX(created_at), NOW()) as last_transaction,
+    COALESCE(MIN(created_at), NOW()) as first_transaction,
+    COUNT(CASE WHEN risk_score > 0.5 THEN 1 END) as high_risk_count
+FROM transactions
+WHERE user_id = ANY($1::uuid[])
+    AND created_at > NOW() - INTERVAL '30 days'
+    AND status IN ('completed', 'confirmed')
+GROUP BY user_id
+"""
+
+async def _init_connection(conn: asyncpg.Connection):
+    """Pool init callback: run a no-op query so session setup completes
+    during pool fill instead of on the first real request."""
+    await conn.execute("SELECT 1")
+
 # Database connection management
 class DatabaseManager:
     def __init__(self):
@@ -30,11 +89,21 @@ class DatabaseManager:
         try:
             self.pool = await asyncpg.create_pool(
                 self.database_url,
-                min_size=1,
-                max_size=10,
-                command_timeout=60
+                min_size=POOL_MIN_SIZE,
+                max_size=POOL_MAX_SIZE,
+                command_timeout=POOL_COMMAND_TIMEOUT_SECONDS,
+                statement_cache_size=STATEMENT_CACHE_SIZE,
+                init=_init_connection
+            )
+            # Actively fill the pool up to min_size so cold-start latency is
+            # paid here, not by the first requests after deploy
+            connections = await asyncio.gather(
+                *[self.pool.acquire() for _ in range(POOL_MIN_SIZE)]
+            )
+            await asyncio.gather(
+                *[self.pool.release(conn) for conn in connections]
             )
-            logger.info("Database pool created successfully")
+            logger.info("Database pool created and warmed successfully")
         except Exception as e:
             logger.error(f"Failed to create database pool: {e}")
             raise
@@ -44,7 +113,9 @@ class DatabaseManager:
         """Get database connection from pool"""
         if not self.pool:
             await self.create_pool()
-        async with self.pool.acquire() as connection:
+        # Bounded acquire so a saturated DB fails fast instead of stacking
+        # coroutines behind the pool indefinitely
+        async with self.pool.acquire(timeout=POOL_ACQUIRE_TIMEOUT_SECONDS) as connection:
             yield connection
     
     async def close_pool(self):
@@ -75,16 +146,27 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson serializes responses in C, several times faster than json.dumps
+    default_response_class=ORJSONResponse
 )
 
+# Default worker count for the standalone launcher; override with the
+# WEB_CONCURRENCY environment variable
+DEFAULT_WEB_CONCURRENCY = 4
+
+# CORS preflight cache lifetime (seconds): browsers reuse the OPTIONS
+# response instead of preflighting every cross-origin POST
+CORS_PREFLIGHT_MAX_AGE_SECONDS = 600
+
 # CORS middleware for frontend integration
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=CORS_PREFLIGHT_MAX_AGE_SECONDS,
 )
 
 class HealthResponse(BaseModel):
@@ -138,6 +220,24 @@ class UserRiskProfileResponse(BaseModel):
     high_risk_transactions: int
     last_analysis_date: str
 
+class TransactionData(TypedDict):
+    """Typed shape of the payload handed to risk analyzers.
+
+    Stays a plain dict at runtime (no extra allocation or conversion) since
+    RiskAnalyzerBase.analyze_risk and the rule engine read it by key.
+    """
+    user_id: str
+    transaction_id: Optional[str]
+    amount_in: float
+    source_chain: str
+    destination_chain: str
+    source_token: str
+    destination_token: str
+    user_address: Optional[str]
+    user_history: Dict[str, Any]
+    hour_of_day: int
+    day_of_week: int
+
 class UserHistoryData(BaseModel):
     total_transactions: int = 0
     total_volume: float = 0.0
@@ -178,14 +278,9 @@ async def health_check():
         "database_status": db_status,
         "ml_models_status": ml_status,
         "blacklist_loaded": True,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
-@app.options("/health")
-async def health_options():
-    """OPTIONS endpoint for health check CORS preflight"""
-    return {"message": "OK"}
-
 # Dependency to get database connection
 async def get_db_connection():
     """Dependency to get database connection"""
@@ -194,37 +289,36 @@ async def get_db_connection():
 
 # Initialize ML models
 risk_analyzer = SimpleRiskAnalyzer()
-blacklist_checker = BlacklistChecker()
+blacklist_checker = DEFAULT_BLACKLIST_CHECKER
 
 # Risk Analysis Service
 class RiskAnalysisService:
     def __init__(self, analyzer: RiskAnalyzerBase):
         self.analyzer = analyzer
+        self._history_cache: TTLCache = TTLCache(
+            maxsize=USER_HISTORY_CACHE_SIZE,
+            ttl=USER_HISTORY_CACHE_TTL_SECONDS
+        )
+
+    def invalidate_user_history(self, user_id: str) -> None:
+        """Drop a cached history entry, e.g. after a new transaction write."""
+        self._history_cache.pop(user_id, None)
 
     async def get_user_history(self, conn: asyncpg.Connection, user_id: str) -> UserHistoryData:
         """Get user transaction history for risk analysis"""
+        cached = self._history_cache.get(user_id)
+        if cached is not None:
+            return cached
+
         try:
-            query = """
-            SELECT 
-                COUNT(*) as total_transactions,
-                COALESCE(SUM(amount_in), 0) as total_volume,
-                COALESCE(AVG(amount_in), 0) as avg_transaction_size,
-                COALESCE(MAX(created_at), NOW()) as last_transaction,
-                COALESCE(MIN(created_at), NOW()) as first_transaction,
-                COUNT(CASE WHEN risk_score > 0.5 THEN 1 END) as high_risk_count
-            FROM transactions 
-            WHERE user_id = $1 
-                AND created_at > NOW() - INTERVAL '30 days'
-                AND status IN ('completed', 'confirmed')
-            """
-            
-            result = await conn.fetchrow(query, user_id)
-            
+            result = await conn.fetchrow(USER_HISTORY_SQL, user_id)
+
             if result and result['total_transactions'] > 0:
+                now = datetime.now(timezone.utc)
                 first_tx = result['first_transaction']
-                days_since_first = (datetime.now() - first_tx.replace(tzinfo=None)).days
-                
-                return UserHistoryData(
+                days_since_first = (now - first_tx.replace(tzinfo=timezone.utc)).days
+
+                history = UserHistoryData(
                     total_transactions=result['total_transactions'],
                     total_volume=float(result['total_volume']),
                     avg_transaction_size=float(result['avg_transaction_size']),
@@ -233,27 +327,82 @@ class RiskAnalysisService:
                     is_new_user=False
                 )
             else:
-                return UserHistoryData(is_new_user=True)
-                
+                history = UserHistoryData(is_new_user=True)
+
+            self._history_cache[user_id] = history
+            return history
+
         except Exception as e:
+            # Errors are not cached so the next request retries the query
             logger.error(f"Error getting user history: {e}")
             return UserHistoryData(is_new_user=True)
     
+    async def get_user_histories(self, conn: asyncpg.Connection, user_ids: List[str]) -> Dict[str, UserHistoryData]:
+        """Get histories for many users with a single aggregation query."""
+        histories: Dict[str, UserHistoryData] = {}
+        missing: List[str] = []
+        for user_id in set(user_ids):
+            cached = self._history_cache.get(user_id)
+            if cached is not None:
+                histories[user_id] = cached
+            else:
+                missing.append(user_id)
+
+        if not missing:
+            return histories
+
+        try:
+            rows = await conn.fetch(USER_HISTORY_BATCH_SQL, missing)
+            now = datetime.now(timezone.utc)
+
+            for row in rows:
+                user_id = str(row['user_id'])
+                first_tx = row['first_transaction']
+                history = UserHistoryData(
+                    total_transactions=row['total_transactions'],
+                    total_volume=float(row['total_volume']),
+                    avg_transaction_size=float(row['avg_transaction_size']),
+                    days_since_first_tx=(now - first_tx.replace(tzinfo=timezone.utc)).days,
+                    high_risk_ratio=row['high_risk_count'] / max(row['total_transactions'], 1),
+                    is_new_user=False
+                )
+                histories[user_id] = history
+                self._history_cache[user_id] = history
+
+            # Users without rows in the window are new users
+            for user_id in missing:
+                if user_id not in histories:
+                    history = UserHistoryData(is_new_user=True)
+                    histories[user_id] = history
+                    self._history_cache[user_id] = history
+
+        except Exception as e:
+            logger.error(f"Error getting batched user history: {e}")
+            for user_id in missing:
+                histories.setdefault(user_id, UserHistoryData(is_new_user=True))
+
+        return histories
+
     def analyze_transaction_risk(self, request: RiskAnalysisRequest, user_history: UserHistoryData) -> RiskAnalysisResponse:
         """ML-powered risk analysis with user history"""
+        # Capture the timestamp once and reuse it for all time-derived fields
+        now = datetime.now(timezone.utc)
+
         # Prepare data for ML analysis
-        transaction_data = {
+        transaction_data: TransactionData = {
             "user_id": request.user_id,
             "transaction_id": request.transaction_id,
             "amount_in": request.amount_in,
-            "source_chain": request.source_chain,
-            "destination_chain": request.destination_chain,
+            # Chain names come from a small fixed vocabulary; interning them
+            # here lets the scorers settle same-chain checks by identity
+            "source_chain": sys.intern(request.source_chain),
+            "destination_chain": sys.intern(request.destination_chain),
             "source_token": request.source_token,
             "destination_token": request.destination_token,
             "user_address": request.user_address,
-            "user_history": user_history.dict(),
-            "hour_of_day": datetime.now().hour,
-            "day_of_week": datetime.now().weekday()
+            "user_history": user_history.model_dump(),
+            "hour_of_day": now.hour,
+            "day_of_week": now.weekday()
         }
         
         # ML analysis using RiskAnalyzer
@@ -267,7 +416,7 @@ class RiskAnalysisService:
             ml_confidence=analysis_result.get('ml_confidence', 0.8),
             is_anomaly=analysis_result.get('is_anomaly', False),
             recommended_action=analysis_result['recommended_action'],
-            analysis_timestamp=datetime.now().isoformat()
+            analysis_timestamp=now.isoformat()
         )
 
 # Create risk service instance
@@ -297,6 +446,28 @@ async def analyze_transaction_risk(
         logger.error(f"Risk analysis failed: {e}")
         raise HTTPException(status_code=500, detail=f"Risk analysis failed: {str(e)}")
 
+@app.post("/api/risk/analyze/batch", response_model=List[RiskAnalysisResponse])
+async def analyze_transaction_risk_batch(
+    requests: List[RiskAnalysisRequest],
+    conn: asyncpg.Connection = Depends(get_db_connection)
+):
+    """Analyze many transactions in one call, amortizing DB round-trips"""
+    try:
+        logger.info(f"Analyzing risk for batch of {len(requests)} transactions")
+
+        histories = await risk_service.get_user_histories(
+            conn, [request.user_id for request in requests]
+        )
+
+        return [
+            risk_service.analyze_transaction_risk(request, histories[request.user_id])
+            for request in requests
+        ]
+
+    except Exception as e:
+        logger.error(f"Batch risk analysis failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch risk analysis failed: {str(e)}")
+
 @app.get("/api/risk/profile/{user_id}", response_model=UserRiskProfileResponse)
 async def get_user_risk_profile(
     user_id: str,
@@ -322,7 +493,7 @@ async def get_user_risk_profile(
             transaction_count=user_history.total_transactions,
             avg_risk_score=user_history.high_risk_ratio,
             high_risk_transactions=int(user_history.total_transactions * user_history.high_risk_ratio),
-            last_analysis_date=datetime.now().isoformat()
+            last_analysis_date=datetime.now(timezone.utc).isoformat()
         )
         
     except Exception as e:
@@ -341,14 +512,14 @@ async def retrain_models():
             return {
                 "status": "skipped",
                 "message": "No new training data available",
-                "timestamp": datetime.now().isoformat()
+                "timestamp": datetime.now(timezone.utc).isoformat()
             }
         
         # SimpleRiskAnalyzer does not support retraining
         return {
             "status": "skipped",
             "message": "Simple risk analyzer does not support retraining",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
         
     except Exception as e:
@@ -374,7 +545,7 @@ async def check_address_blacklist(address: str, chain: str):
             "address": address,
             "chain": chain,
             **result,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
     except Exception as e:
         logger.error(f"Blacklist check failed: {e}")
@@ -386,4 +557,13 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=settings.port)
+    # uvloop and httptools replace the default asyncio loop and h11 parser
+    # with their C implementations; workers require the import-string form
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=settings.port,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", DEFAULT_WEB_CONCURRENCY))
+    )
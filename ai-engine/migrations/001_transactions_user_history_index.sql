@@ -0,0 +1,13 @@
+-- Partial composite index backing the AI engine user-history aggregation
+-- (USER_HISTORY_SQL / USER_HISTORY_BATCH_SQL in main.py).
+-- The query filters by user_id, a 30-day created_at window and
+-- status IN ('completed', 'confirmed'); without a matching index it
+-- degrades to a sequential scan of transactions.
+
+-- INCLUDE covers the aggregated columns so the query can run as an
+-- index-only scan. On a busy production database, run with CONCURRENTLY
+-- (outside a transaction) to avoid blocking writes.
+CREATE INDEX IF NOT EXISTS idx_transactions_user_recent
+ON transactions (user_id, created_at DESC)
+INCLUDE (amount_in, risk_score)
+WHERE status IN ('completed', 'confirmed');
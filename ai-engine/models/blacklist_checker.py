@@ -1,143 +1,294 @@
 """Module for checking addresses against known malicious lists."""
 
 import logging
-from typing import Set, List, Dict, Optional
+import re
+from typing import Dict, Optional, Set, Tuple
 import asyncio
 import aiohttp
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+from cachetools import TTLCache
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - exercised only without the C extension
+    ahocorasick = None
 
 logger = logging.getLogger(__name__)
 
+# External API cache sizing: bounded memory with LRU eviction and O(1)
+# expiry on access rather than a background sweep. 10k entries comfortably
+# covers the distinct-address working set between TTL rollovers.
+EXTERNAL_API_CACHE_SIZE = 10_000
+EXTERNAL_API_CACHE_TTL_SECONDS = 3600
+
+# Null-like patterns that are only meaningful at the start of an address:
+# checked with a C-level anchored startswith instead of a full substring scan
+ETH_SUSPICIOUS_PREFIXES = ("0x000000", "0xffffff")
+
+# Suspicious patterns that can occur anywhere in the address, compiled into
+# the single-pass matchers at init and mapped to (reason, score) payloads
+ETH_SUSPICIOUS_PATTERNS = ("deadbeef",)
+NEAR_SUSPICIOUS_KEYWORDS = ("scam", "phish", "fake", "fraud", "hack")
+
+# Ethereum addresses only ever mix case across the hex digits and the
+# "0x" prefix, so this small table lowers them without str.lower()'s full
+# Unicode case-folding walk. X is included for "0X"-prefixed input
+_ETH_LOWER_TABLE = str.maketrans("ABCDEFX", "abcdefx")
+
+class _PatternMatcher:
+    """Single-pass multi-pattern matcher over a fixed pattern set.
+
+    Prefers a pyahocorasick automaton (C-level scan) and falls back to one
+    compiled regex alternation when the extension is unavailable; either way
+    the input is scanned once instead of looping over patterns in Python.
+    """
+
+    def __init__(self, payloads: Dict[str, Tuple[str, float]]):
+        self._payloads = payloads
+        # Pick the scan strategy once here so first_match carries no
+        # per-call "which engine" branch
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for pattern, payload in payloads.items():
+                self._automaton.add_word(pattern, payload)
+            self._automaton.make_automaton()
+            self.first_match = self._first_match_automaton
+        else:
+            self._regex = re.compile("|".join(map(re.escape, payloads)))
+            self.first_match = self._first_match_regex
+
+    def first_match(self, text: str) -> Optional[Tuple[str, float]]:
+        """Return the (reason, score) payload of the first matching pattern.
+
+        Rebound per instance in __init__ to the automaton or regex scan;
+        both walk the input once at C level.
+        """
+        raise NotImplementedError  # pragma: no cover - always rebound
+
+    def _first_match_automaton(self, text: str) -> Optional[Tuple[str, float]]:
+        for _, payload in self._automaton.iter(text):
+            return payload
+        return None
+
+    def _first_match_regex(self, text: str) -> Optional[Tuple[str, float]]:
+        match = self._regex.search(text)
+        return self._payloads[match.group(0)] if match else None
+
+class _BloomFilter:
+    """Small dependency-free Bloom filter used as a negative pre-check.
+
+    A probe touches a few bits in a cache-resident bytearray, so the
+    overwhelmingly common "not blacklisted" case is rejected before any
+    set hashing happens. False positives only cost the exact set lookup
+    that would have run anyway; false negatives cannot occur.
+    """
+
+    NUM_BITS = 1 << 16
+    NUM_HASHES = 4
+
+    def __init__(self, items=()):
+        self._bits = bytearray(self.NUM_BITS // 8)
+        for item in items:
+            self.add(item)
+
+    def _positions(self, item: str):
+        # Double hashing: two independent seeds derive all probe positions
+        h1 = hash(item)
+        h2 = hash("\x00" + item)
+        mask = self.NUM_BITS - 1
+        return [(h1 + i * h2) & mask for i in range(self.NUM_HASHES)]
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+# Matchers are compiled once at import and shared by every checker
+# instance; the pattern sets are static so there is nothing per-instance
+_ETH_MATCHER = _PatternMatcher({
+    pattern: (f"Suspicious address pattern: {pattern}", 0.5)
+    for pattern in ETH_SUSPICIOUS_PATTERNS
+})
+_NEAR_MATCHER = _PatternMatcher({
+    keyword: (f"Suspicious NEAR account name contains: {keyword}", 0.7)
+    for keyword in NEAR_SUSPICIOUS_KEYWORDS
+})
+
+# Shared result for the common "not blacklisted" path, avoiding a dict
+# allocation per check. Treat as immutable: copy before mutating.
+CLEAN_RESULT = {
+    "is_blacklisted": False,
+    "reason": None,
+    "source": None,
+    "risk_score_increase": 0.0
+}
+
 class BlacklistChecker:
     def __init__(self):
-        # Static blacklist used for demonstration
-        self.static_blacklist: Set[str] = {
+        # Static blacklist used for demonstration; frozen and normalized to
+        # lowercase once so lookups never re-case the stored members
+        self.static_blacklist: frozenset = frozenset(address.lower() for address in {
             # Known fraudulent Ethereum addresses (examples)
             "0x000000000000000000000000000000000000dead",
             "0x0000000000000000000000000000000000000000",
             # Fake addresses for testing
             "0x1234567890123456789012345678901234567890",
             "0xdeadbeefdeadbeefdeadbeefdeadbeefdeadbeef",
-        }
-        
+        })
+
         # NEAR blacklist
-        self.near_blacklist: Set[str] = {
+        self.near_blacklist: frozenset = frozenset({
             "scammer.near",
-            "phishing.near", 
+            "phishing.near",
             "fake-wallet.near"
-        }
-        
-        # Cache for external API results
-        self.cache: Dict[str, Dict] = {}
-        self.cache_ttl = timedelta(hours=1)
-        
-    def is_ethereum_address_blacklisted(self, address: str) -> Dict[str, any]:
-        """Check an Ethereum address against the blacklist."""
-        address_lower = address.lower()
+        })
+
+        # Runtime additions from add_to_blacklist live in separate mutable
+        # sets so the static lists stay immutable
+        self._dynamic_eth_blacklist: Set[str] = set()
+        self._dynamic_near_blacklist: Set[str] = set()
+
+        # Bumped on every successful add_to_blacklist; callers that memoize
+        # check results compare it to know when to invalidate
+        self.version: int = 0
+
+        # Bloom pre-filters reject non-blacklisted addresses before the
+        # exact set lookups; kept in sync by add_to_blacklist
+        self._eth_bloom = _BloomFilter(self.static_blacklist)
+        self._near_bloom = _BloomFilter(self.near_blacklist)
         
-        result = {
-            "is_blacklisted": False,
-            "reason": None,
-            "source": None,
-            "risk_score_increase": 0.0
+        # Cache for external API results; TTLCache evicts expired entries
+        # on access and keeps memory bounded under sustained traffic
+        self.cache: TTLCache = TTLCache(
+            maxsize=EXTERNAL_API_CACHE_SIZE,
+            ttl=EXTERNAL_API_CACHE_TTL_SECONDS
+        )
+
+        # Precompiled multi-pattern matchers: the address is scanned once
+        # at C level instead of looping over patterns in Python
+        self._eth_matcher = _ETH_MATCHER
+        self._near_matcher = _NEAR_MATCHER
+
+        # Chain dispatch: one dict probe replaces the lower()+if/elif chain
+        # in check_address for canonical chain names
+        self._chain_dispatch = {
+            "ethereum": self.is_ethereum_address_blacklisted,
+            "near": self.is_near_address_blacklisted,
         }
-        
-        # Check against the static blacklist
-        if address_lower in self.static_blacklist:
-            result.update({
+
+    def is_ethereum_address_blacklisted(self, address: str, address_lower: Optional[str] = None) -> Dict[str, any]:
+        """Check an Ethereum address against the blacklist."""
+        if address_lower is None:
+            # islower() is a single C scan; checksummed addresses only mix
+            # case in the hex digits, which the small table handles
+            address_lower = address if address.islower() else address.translate(_ETH_LOWER_TABLE)
+
+        # Check against the static and runtime blacklists; the Bloom probe
+        # rejects almost all clean addresses before any set hashing
+        if address_lower in self._eth_bloom and (
+            address_lower in self.static_blacklist
+            or address_lower in self._dynamic_eth_blacklist
+        ):
+            return {
                 "is_blacklisted": True,
                 "reason": "Address in static blacklist",
                 "source": "kembridge_static",
                 "risk_score_increase": 1.0  # Maximum risk
-            })
-            return result
-        
-        # Check common suspicious patterns
-        suspicious_patterns = [
-            "0x000000",  # Null-like addresses
-            "0xffffff",  # Suspicious patterns
-            "deadbeef",  # Common test patterns
-        ]
-        
-        for pattern in suspicious_patterns:
-            if pattern in address_lower:
-                result.update({
-                    "is_blacklisted": True,
-                    "reason": f"Suspicious address pattern: {pattern}",
-                    "source": "pattern_detection",
-                    "risk_score_increase": 0.5
-                })
-                return result
-        
-        return result
+            }
+
+        # Anchored prefix check: bails out after a few bytes for clean
+        # addresses; the inner loop only runs on the rare hit
+        if address_lower.startswith(ETH_SUSPICIOUS_PREFIXES):
+            for prefix in ETH_SUSPICIOUS_PREFIXES:
+                if address_lower.startswith(prefix):
+                    return {
+                        "is_blacklisted": True,
+                        "reason": f"Suspicious address pattern: {prefix}",
+                        "source": "pattern_detection",
+                        "risk_score_increase": 0.5
+                    }
+
+        # Check common suspicious patterns in a single pass
+        if (hit := self._eth_matcher.first_match(address_lower)) is not None:
+            reason, score = hit
+            return {
+                "is_blacklisted": True,
+                "reason": reason,
+                "source": "pattern_detection",
+                "risk_score_increase": score
+            }
+
+        return CLEAN_RESULT
     
-    def is_near_address_blacklisted(self, address: str) -> Dict[str, any]:
+    def is_near_address_blacklisted(self, address: str, address_lower: Optional[str] = None) -> Dict[str, any]:
         """Check a NEAR address against the blacklist."""
-        result = {
-            "is_blacklisted": False,
-            "reason": None,
-            "source": None,
-            "risk_score_increase": 0.0
-        }
-        
-        if address in self.near_blacklist:
-            result.update({
+        if address_lower is None:
+            address_lower = address.lower()
+
+        if address in self._near_bloom and (
+            address in self.near_blacklist
+            or address in self._dynamic_near_blacklist
+        ):
+            return {
                 "is_blacklisted": True,
                 "reason": "NEAR address in blacklist",
                 "source": "kembridge_near_static",
                 "risk_score_increase": 1.0
-            })
-            return result
-        
-        # Check suspicious NEAR account name patterns
-        suspicious_keywords = ["scam", "phish", "fake", "fraud", "hack"]
-        for keyword in suspicious_keywords:
-            if keyword in address.lower():
-                result.update({
-                    "is_blacklisted": True,
-                    "reason": f"Suspicious NEAR account name contains: {keyword}",
-                    "source": "near_pattern_detection",
-                    "risk_score_increase": 0.7
-                })
-                return result
-        
-        return result
+            }
+
+        # Check suspicious NEAR account name patterns in a single pass
+        if (hit := self._near_matcher.first_match(address_lower)) is not None:
+            reason, score = hit
+            return {
+                "is_blacklisted": True,
+                "reason": reason,
+                "source": "near_pattern_detection",
+                "risk_score_increase": score
+            }
+
+        return CLEAN_RESULT
     
     def check_address(self, address: str, chain: str) -> Dict[str, any]:
         """Unified method to check an address."""
         try:
-            if chain.lower() == "ethereum":
-                return self.is_ethereum_address_blacklisted(address)
-            elif chain.lower() == "near":
-                return self.is_near_address_blacklisted(address)
-            else:
+            # Canonical lowercase names hit the dispatch table directly; the
+            # lower() retry only runs for unusual casings
+            handler = self._chain_dispatch.get(chain) or self._chain_dispatch.get(chain.lower())
+            if handler is None:
                 logger.warning(f"Unsupported chain for blacklist check: {chain}")
-                return {
-                    "is_blacklisted": False,
-                    "reason": None,
-                    "source": None,
-                    "risk_score_increase": 0.0
-                }
+                return CLEAN_RESULT
+
+            # Normalize once; the per-chain helpers reuse it instead of
+            # re-lowering the address. Most callers already pass lowercase,
+            # so the common case is a scan with no new string allocated
+            address_lower = address if address.islower() else address.lower()
+            return handler(address, address_lower)
         except Exception as e:
             logger.error(f"Error checking blacklist for {address} on {chain}: {e}")
-            return {
-                "is_blacklisted": False,
-                "reason": None,
-                "source": None,
-                "risk_score_increase": 0.0
-            }
+            return CLEAN_RESULT
     
+    async def check_address_async(self, address: str, chain: str) -> Dict[str, any]:
+        """Run check_address in a worker thread.
+
+        Today's in-memory checks are cheap enough to call inline from
+        async handlers; this entry point keeps the event loop responsive
+        for callers scoring large batches, and becomes the right default
+        once external feeds make the check genuinely blocking.
+        """
+        return await asyncio.to_thread(self.check_address, address, chain)
+
     async def check_external_api(self, address: str, chain: str) -> Dict[str, any]:
         """Placeholder for future external API integration."""
         cache_key = f"{chain}:{address}"
-        
-        # Check cache
-        if cache_key in self.cache:
-            cached_data = self.cache[cache_key]
-            if datetime.now() - cached_data["timestamp"] < self.cache_ttl:
-                return cached_data["result"]
-        
+
+        # Check cache (TTLCache handles expiry internally)
+        if (cached := self.cache.get(cache_key)) is not None:
+            return cached
+
         # Placeholder for external API call
         # In production this would be a real API call
         result = {
@@ -146,25 +297,26 @@ class BlacklistChecker:
             "source": "external_api_placeholder",
             "risk_score_increase": 0.0
         }
-        
+
         # Cache the result
-        self.cache[cache_key] = {
-            "result": result,
-            "timestamp": datetime.now()
-        }
-        
+        self.cache[cache_key] = result
+
         return result
     
     def add_to_blacklist(self, address: str, chain: str, reason: str) -> bool:
         """Add an address to the blacklist (admin function)."""
         try:
             if chain.lower() == "ethereum":
-                self.static_blacklist.add(address.lower())
+                address_lower = address.lower()
+                self._dynamic_eth_blacklist.add(address_lower)
+                self._eth_bloom.add(address_lower)
             elif chain.lower() == "near":
-                self.near_blacklist.add(address)
+                self._dynamic_near_blacklist.add(address)
+                self._near_bloom.add(address)
             else:
                 return False
-            
+
+            self.version += 1
             logger.info(f"Added {address} to {chain} blacklist: {reason}")
             return True
             
@@ -175,8 +327,13 @@ class BlacklistChecker:
     def get_blacklist_stats(self) -> Dict[str, any]:
         """Return blacklist statistics."""
         return {
-            "ethereum_blacklist_size": len(self.static_blacklist),
-            "near_blacklist_size": len(self.near_blacklist),
+            "ethereum_blacklist_size": len(self.static_blacklist) + len(self._dynamic_eth_blacklist),
+            "near_blacklist_size": len(self.near_blacklist) + len(self._dynamic_near_blacklist),
             "cache_size": len(self.cache),
-            "last_updated": datetime.now().isoformat()
-        }
\ No newline at end of file
+            "last_updated": datetime.now(timezone.utc).isoformat()
+        }
+
+# Process-wide shared checker: the blacklist sets, Bloom filters and
+# pattern matchers are built once at import and queried by every analyzer
+# instead of being duplicated per instance
+DEFAULT_BLACKLIST_CHECKER = BlacklistChecker()
\ No newline at end of file
@@ -1,52 +1,199 @@
+import sys
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
 from typing import Dict, List, Tuple
-from config import settings
+import numpy as np
+from config import get_settings
 
+settings = get_settings()
 
-def rule_based_score(transaction_data: Dict) -> Tuple[float, List[str]]:
-    """Calculate rule-based score and corresponding factors."""
+# Risk-level lookup: sorted thresholds plus a parallel tier table, so a
+# single bisect replaces the comparison chain and keeps the tiers in sync
+# with the configured settings.risk_threshold_* values
+_LEVEL_THRESHOLDS = (
+    settings.risk_threshold_low,
+    settings.risk_threshold_medium,
+    settings.risk_threshold_high,
+)
+_LEVELS = (
+    ("low", True, "proceed"),
+    ("medium", True, "proceed_with_monitoring"),
+    ("high", False, "manual_review_required"),
+    ("critical", False, "block_transaction"),
+)
+
+# Amount tier lookup: bisect_left into the sorted thresholds keeps the
+# strict > comparisons of the original ladder while replacing the branchy
+# if/elif chain with one binary search into parallel tables
+_AMOUNT_THRESHOLDS = (1.0, 10.0, 100.0)
+_AMOUNT_DELTAS = (0.0, 0.1, 0.2, 0.4)
+
+# Factor strings indexed by the bit positions _score_kernel reports; the
+# first three correspond to the amount tiers above. Interned so every
+# result payload shares the same string objects
+_FACTOR_STRINGS = tuple(sys.intern(s) for s in (
+    "Medium transaction amount (>1)",
+    "Large transaction amount (>10)",
+    "Very large transaction amount (>100)",
+    "Cross-chain transaction",
+    "New user with no transaction history",
+    "User has history of high-risk transactions",
+    "Transaction significantly larger than user average",
+))
+
+# Shared factor payload for transactions that trip no rule at all
+NORMAL_FACTORS = (sys.intern("Transaction appears normal"),)
+_F_CROSS_CHAIN = 1 << 3
+_F_NEW_USER = 1 << 4
+_F_HIGH_RISK_HISTORY = 1 << 5
+_F_LARGER_THAN_AVG = 1 << 6
+
+# Array copies of the lookup tables for the vectorized scorer
+_AMOUNT_DELTAS_ARR = np.asarray(_AMOUNT_DELTAS)
+_LEVEL_THRESHOLDS_ARR = np.asarray(_LEVEL_THRESHOLDS)
+
+# Shared stand-in for an absent or empty user history, so scoring code can
+# bind the history dict once instead of re-applying defaults per lookup.
+# Treat as immutable.
+EMPTY_USER_HISTORY = {
+    "is_new_user": True,
+    "high_risk_ratio": 0.0,
+    "avg_transaction_size": 0.0,
+    "total_transactions": 0,
+}
+
+
+def _score_kernel(
+    amount: float,
+    is_cross_chain: bool,
+    is_new_user: bool,
+    high_risk_ratio: float,
+    avg_transaction_size: float,
+    _bisect_left=bisect_left,
+    _thresholds=_AMOUNT_THRESHOLDS,
+    _deltas=_AMOUNT_DELTAS,
+) -> Tuple[float, int]:
+    """Numeric scoring core: scalars in, score and factor bitmask out.
+
+    Deliberately free of dict and string work so the whole function is
+    plain arithmetic and branches; triggered factors come back as bits
+    that the caller decodes through _FACTOR_STRINGS. This is effectively
+    the specialized function a rule-to-source compiler would emit for the
+    current ruleset: thresholds and weights are literals or default-arg
+    locals, so nothing is resolved through module globals at call time.
+    """
     risk_score = 0.1
-    factors: List[str] = []
+    mask = 0
 
-    amount = float(transaction_data.get("amount_in", 0))
-    if amount > 100:
-        risk_score += 0.4
-        factors.append("Very large transaction amount (>100)")
-    elif amount > 10:
-        risk_score += 0.2
-        factors.append("Large transaction amount (>10)")
-    elif amount > 1:
-        risk_score += 0.1
-        factors.append("Medium transaction amount (>1)")
+    tier = _bisect_left(_thresholds, amount)
+    risk_score += _deltas[tier]
+    if tier:
+        mask |= 1 << (tier - 1)
 
-    if transaction_data.get("source_chain") != transaction_data.get("destination_chain"):
+    if is_cross_chain:
         risk_score += 0.1
-        factors.append("Cross-chain transaction")
+        mask |= _F_CROSS_CHAIN
 
-    user_history = transaction_data.get("user_history", {})
-    if user_history.get("is_new_user", True):
-        risk_score += 0.2
-        factors.append("New user with no transaction history")
-    elif user_history.get("high_risk_ratio", 0) > 0.3:
+    if is_new_user:
         risk_score += 0.2
-        factors.append("User has history of high-risk transactions")
+        mask |= _F_NEW_USER
+    else:
+        if high_risk_ratio > 0.3:
+            risk_score += 0.2
+            mask |= _F_HIGH_RISK_HISTORY
+        if avg_transaction_size > 0 and amount > avg_transaction_size * 5:
+            risk_score += 0.3
+            mask |= _F_LARGER_THAN_AVG
+
+    return (risk_score if risk_score < 1.0 else 1.0), mask
+
+
+def rule_based_score(transaction_data: Dict) -> Tuple[float, Tuple[str, ...]]:
+    """Calculate rule-based score and corresponding factors."""
+    # Bind the bound get methods once; each field is then fetched exactly
+    # once without re-resolving the method per lookup
+    td_get = transaction_data.get
+    uh_get = (td_get("user_history") or EMPTY_USER_HISTORY).get
+
+    # amount_in is almost always a float already; the exact type check
+    # skips PyNumber_Float dispatch for that case
+    amount = td_get("amount_in", 0)
+    if type(amount) is not float:
+        amount = float(amount)
+
+    # Interned chain names short-circuit on identity before the string
+    # comparison runs
+    src = td_get("source_chain")
+    dst = td_get("destination_chain")
+
+    risk_score, mask = _score_kernel(
+        amount,
+        (src is not dst) and (src != dst),
+        uh_get("is_new_user", True),
+        uh_get("high_risk_ratio", 0),
+        uh_get("avg_transaction_size", 0),
+    )
+
+    return risk_score, decode_factors(mask)
+
+
+@lru_cache(maxsize=256)
+def decode_factors(mask: int) -> Tuple[str, ...]:
+    """Translate a _score_kernel factor bitmask into its strings.
+
+    Only 2**7 masks exist, so every distinct combination is decoded once
+    and the same immutable tuple is shared by all results carrying it.
+    """
+    factors = []
+    bit = 0
+    while mask:
+        if mask & 1:
+            factors.append(_FACTOR_STRINGS[bit])
+        mask >>= 1
+        bit += 1
+    return tuple(factors)
+
+
+def rule_based_score_batch(
+    amounts: np.ndarray,
+    is_cross_chain: np.ndarray,
+    is_new_user: np.ndarray,
+    high_risk_ratio: np.ndarray,
+    avg_transaction_size: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized _score_kernel over parallel arrays.
+
+    Each ufunc runs once per batch instead of once per transaction;
+    returns the clamped scores and the per-row factor bitmasks. Must stay
+    semantically identical to _score_kernel.
+    """
+    tier = np.searchsorted(_AMOUNT_THRESHOLDS, amounts, side="left")
+    scores = 0.1 + _AMOUNT_DELTAS_ARR[tier]
+    masks = np.where(tier > 0, np.left_shift(1, np.maximum(tier, 1) - 1), 0)
+
+    scores += 0.1 * is_cross_chain
+    masks |= np.where(is_cross_chain, _F_CROSS_CHAIN, 0)
+
+    scores += 0.2 * is_new_user
+    masks |= np.where(is_new_user, _F_NEW_USER, 0)
+
+    returning = ~is_new_user
+    risky_history = returning & (high_risk_ratio > 0.3)
+    scores += 0.2 * risky_history
+    masks |= np.where(risky_history, _F_HIGH_RISK_HISTORY, 0)
+
+    above_average = returning & (avg_transaction_size > 0) & (amounts > avg_transaction_size * 5)
+    scores += 0.3 * above_average
+    masks |= np.where(above_average, _F_LARGER_THAN_AVG, 0)
+
+    return np.minimum(scores, 1.0), masks
 
-    if (
-        not user_history.get("is_new_user", True)
-        and user_history.get("avg_transaction_size", 0) > 0
-        and amount > user_history.get("avg_transaction_size", 0) * 5
-    ):
-        risk_score += 0.3
-        factors.append("Transaction significantly larger than user average")
 
-    return min(risk_score, 1.0), factors
+def determine_risk_level_batch(scores: np.ndarray) -> List[Tuple[str, bool, str]]:
+    """Vectorized determine_risk_level: one searchsorted for the batch."""
+    return [_LEVELS[i] for i in np.searchsorted(_LEVEL_THRESHOLDS_ARR, scores, side="right")]
 
 
 def determine_risk_level(score: float) -> Tuple[str, bool, str]:
     """Map score to risk level, approval flag and recommended action."""
-    if score < settings.risk_threshold_low:
-        return "low", True, "proceed"
-    if score < settings.risk_threshold_medium:
-        return "medium", True, "proceed_with_monitoring"
-    if score < settings.risk_threshold_high:
-        return "high", False, "manual_review_required"
-    return "critical", False, "block_transaction" 
\ No newline at end of file
+    return _LEVELS[bisect_right(_LEVEL_THRESHOLDS, score)]
\ No newline at end of file
@@ -3,6 +3,9 @@ Risk Analyzer Module
 ML-powered risk analysis for bridge transactions
 """
 
+import math
+import threading
+import time
 import numpy as np
 import logging
 from typing import Dict, List, Tuple, Optional
@@ -12,25 +15,72 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.preprocessing import StandardScaler
 import joblib
 import os
-from .blacklist_checker import BlacklistChecker
+from .blacklist_checker import BlacklistChecker, CLEAN_RESULT, DEFAULT_BLACKLIST_CHECKER
+from bisect import bisect_left
+from .common_rules import (
+    EMPTY_USER_HISTORY,
+    determine_risk_level,
+    _AMOUNT_DELTAS,
+    _AMOUNT_THRESHOLDS,
+)
 
 logger = logging.getLogger(__name__)
 
+# Width of the feature vector produced by extract_features; model
+# initialization and training must use the same layout
+NUM_FEATURES = 16
+
+# The whole feature pipeline runs in float32: half the bytes per cache
+# line and twice the SIMD lanes, with far more precision than these
+# bucketed features need. sklearn preserves the input dtype end to end.
+FEATURE_DTYPE = np.float32
+
+# Hour-of-day is an integer 0-23, so its cyclical encoding has exactly 24
+# possible values; the tables turn two libm calls per scoring into indexing
+_HOD_SIN = tuple(math.sin(2 * math.pi * hour / 24) for hour in range(24))
+_HOD_COS = tuple(math.cos(2 * math.pi * hour / 24) for hour in range(24))
+
+# All three fitted models ship in one uncompressed joblib bundle so startup
+# does a single load and the backing ndarrays can be memory-mapped and
+# shared read-only across worker processes
+MODEL_BUNDLE_FILENAME = "risk_models.joblib"
+
+# Weights of the combined risk score; shared by the single-row and batch
+# paths so the two can never drift apart
+_W_ML = 0.4
+_W_ANOMALY = 0.3
+_W_RULE = 0.3
+
 class RiskAnalyzer:
-    def __init__(self, model_path: str = "models/saved/"):
+    def __init__(self, model_path: str = "models/saved/",
+                 blacklist_checker: Optional[BlacklistChecker] = None):
         self.model_path = model_path
         self.isolation_forest = None
         self.risk_classifier = None
         self.feature_scaler = None
-        self.blacklist_checker = BlacklistChecker()
+        self.blacklist_checker = blacklist_checker or DEFAULT_BLACKLIST_CHECKER
         self.is_trained = False
-        
+
+        # Scratch buffer reused by extract_features: one allocation per
+        # thread instead of one per transaction. Thread-local because the
+        # async entry points score on worker threads, where a single shared
+        # buffer would let concurrent extractions overwrite each other.
+        # Callers that keep the row past the next extraction on the same
+        # thread must copy it (see retrain_models)
+        self._feat_local = threading.local()
+
+        # Snapshots of fitted model parameters for the single-row fast path
+        self._scaler_mean = None
+        self._scaler_scale = None
+        self._lr_weights = None
+        self._lr_intercept = 0.0
+
         # Ensure model directory exists
         os.makedirs(self.model_path, exist_ok=True)
-        
+
         # Load saved models
         self._load_models()
-        
+
         # If models not loaded, create basic ones
         if not self.is_trained:
             self._initialize_basic_models()
@@ -38,19 +88,35 @@ class RiskAnalyzer:
     def _load_models(self):
         """Load trained models"""
         try:
-            isolation_path = os.path.join(self.model_path, "isolation_forest.joblib")
-            classifier_path = os.path.join(self.model_path, "risk_classifier.joblib")
-            scaler_path = os.path.join(self.model_path, "feature_scaler.joblib")
-            
-            if all(os.path.exists(p) for p in [isolation_path, classifier_path, scaler_path]):
-                self.isolation_forest = joblib.load(isolation_path)
-                self.risk_classifier = joblib.load(classifier_path)
-                self.feature_scaler = joblib.load(scaler_path)
+            bundle_path = os.path.join(self.model_path, MODEL_BUNDLE_FILENAME)
+            if os.path.exists(bundle_path):
+                # One load for all three models; mmap keeps the array
+                # buffers on disk instead of copying them into each worker
+                self.isolation_forest, self.risk_classifier, self.feature_scaler = \
+                    joblib.load(bundle_path, mmap_mode='r')
                 self.is_trained = True
+                self._cache_model_params()
                 logger.info("ML models loaded successfully")
+                return
+
+            # Legacy three-file layout: load once more and migrate to the
+            # bundle so subsequent startups take the single-load path
+            legacy_paths = [
+                os.path.join(self.model_path, "isolation_forest.joblib"),
+                os.path.join(self.model_path, "risk_classifier.joblib"),
+                os.path.join(self.model_path, "feature_scaler.joblib"),
+            ]
+            if all(os.path.exists(p) for p in legacy_paths):
+                self.isolation_forest = joblib.load(legacy_paths[0])
+                self.risk_classifier = joblib.load(legacy_paths[1])
+                self.feature_scaler = joblib.load(legacy_paths[2])
+                self.is_trained = True
+                self._cache_model_params()
+                self._save_models()
+                logger.info("ML models loaded from legacy files and bundled")
             else:
                 logger.info("No pre-trained models found, will initialize basic models")
-                
+
         except Exception as e:
             logger.error(f"Error loading models: {e}")
             self.is_trained = False
@@ -60,8 +126,9 @@ class RiskAnalyzer:
         try:
             logger.info("Initializing basic ML models...")
             
-            # Create dummy training data for demonstration
-            X_dummy = np.random.rand(100, 15)  # 100 samples, 15 features
+            # Create dummy training data for demonstration, matching the
+            # extract_features layout
+            X_dummy = np.random.rand(100, NUM_FEATURES).astype(FEATURE_DTYPE)
             y_dummy = np.random.choice([0, 1], 100, p=[0.8, 0.2])  # 20% high risk
             
             # Initialize models
@@ -82,67 +149,95 @@ class RiskAnalyzer:
             
             # Save models
             self._save_models()
-            
+
             self.is_trained = True
+            self._cache_model_params()
             logger.info("Basic ML models initialized successfully")
             
         except Exception as e:
             logger.error(f"Failed to initialize basic models: {e}")
             self.is_trained = False
     
+    def _cache_model_params(self):
+        """Snapshot fitted scaler/classifier parameters.
+
+        The single-row hot path applies these directly, skipping sklearn's
+        per-call validation and array-copy machinery.
+        """
+        self._scaler_mean = self.feature_scaler.mean_.astype(FEATURE_DTYPE)
+        self._scaler_scale = self.feature_scaler.scale_.astype(FEATURE_DTYPE)
+        self._lr_weights = self.risk_classifier.coef_[0].astype(FEATURE_DTYPE)
+        self._lr_intercept = float(self.risk_classifier.intercept_[0])
+
+    def _lr_proba(self, features: np.ndarray) -> float:
+        """Positive-class probability from the snapshotted weights."""
+        z = float(features @ self._lr_weights) + self._lr_intercept
+        return 1.0 / (1.0 + math.exp(-z))
+
     def _save_models(self):
         """Save models"""
         try:
-            joblib.dump(self.isolation_forest, os.path.join(self.model_path, "isolation_forest.joblib"))
-            joblib.dump(self.risk_classifier, os.path.join(self.model_path, "risk_classifier.joblib"))
-            joblib.dump(self.feature_scaler, os.path.join(self.model_path, "feature_scaler.joblib"))
+            # compress=0 keeps the ndarrays raw so _load_models can mmap them
+            joblib.dump(
+                (self.isolation_forest, self.risk_classifier, self.feature_scaler),
+                os.path.join(self.model_path, MODEL_BUNDLE_FILENAME),
+                compress=0
+            )
             logger.info("Models saved successfully")
         except Exception as e:
             logger.error(f"Failed to save models: {e}")
     
     def extract_features(self, transaction_data: Dict) -> np.ndarray:
-        """Feature extraction for ML analysis"""
-        features = []
-        
-        # Transaction amount features
-        amount = float(transaction_data.get('amount_in', 0))
-        features.extend([
-            amount,
-            np.log1p(amount),  # Log transformation
-            min(amount / 1000, 1.0),  # Normalized amount
-        ])
-        
+        """Feature extraction for ML analysis.
+
+        Writes scalars straight into a per-thread reusable buffer using
+        math-module functions, avoiding the intermediate Python list and the
+        per-scalar NumPy ufunc dispatch of the previous implementation. The
+        returned array is overwritten by this thread's next call.
+        """
+        features = getattr(self._feat_local, "buf", None)
+        if features is None:
+            features = self._feat_local.buf = np.empty((1, NUM_FEATURES), dtype=FEATURE_DTYPE)
+        out = features[0]
+
+        # Transaction amount features; the exact type check skips float()
+        # dispatch when amount_in already is one
+        amount = transaction_data.get('amount_in', 0)
+        if type(amount) is not float:
+            amount = float(amount)
+        out[0] = amount
+        out[1] = math.log1p(amount)  # Log transformation
+        out[2] = min(amount / 1000, 1.0)  # Normalized amount
+
         # Chain features (one-hot encoding)
         source_chain = transaction_data.get('source_chain', '').lower()
         dest_chain = transaction_data.get('destination_chain', '').lower()
-        features.extend([
-            1.0 if source_chain == 'ethereum' else 0.0,
-            1.0 if source_chain == 'near' else 0.0,
-            1.0 if dest_chain == 'ethereum' else 0.0,
-            1.0 if dest_chain == 'near' else 0.0,
-            1.0 if source_chain != dest_chain else 0.0,  # Cross-chain indicator
-        ])
-        
+        out[3] = 1.0 if source_chain == 'ethereum' else 0.0
+        out[4] = 1.0 if source_chain == 'near' else 0.0
+        out[5] = 1.0 if dest_chain == 'ethereum' else 0.0
+        out[6] = 1.0 if dest_chain == 'near' else 0.0
+        out[7] = 1.0 if source_chain != dest_chain else 0.0  # Cross-chain indicator
+
         # User history features
         user_history = transaction_data.get('user_history', {})
-        features.extend([
-            float(user_history.get('total_transactions', 0)),
-            float(user_history.get('total_volume', 0)),
-            float(user_history.get('avg_transaction_size', 0)),
-            float(user_history.get('days_since_first_tx', 0)),
-            float(user_history.get('high_risk_ratio', 0)),
-            1.0 if user_history.get('is_new_user', True) else 0.0,
-        ])
-        
-        # Time-based features (cyclical representation)
-        hour_of_day = transaction_data.get('hour_of_day', datetime.now().hour)
-        day_of_week = transaction_data.get('day_of_week', datetime.now().weekday())
-        features.extend([
-            np.sin(2 * np.pi * hour_of_day / 24),
-            np.cos(2 * np.pi * hour_of_day / 24),
-        ])
-        
-        return np.array(features).reshape(1, -1)
+        out[8] = float(user_history.get('total_transactions', 0))
+        out[9] = float(user_history.get('total_volume', 0))
+        out[10] = float(user_history.get('avg_transaction_size', 0))
+        out[11] = float(user_history.get('days_since_first_tx', 0))
+        out[12] = float(user_history.get('high_risk_ratio', 0))
+        out[13] = 1.0 if user_history.get('is_new_user', True) else 0.0
+
+        # Time-based features (cyclical representation). The UTC-hour
+        # fallback is plain integer math on the epoch clock instead of a
+        # datetime construction per scoring call
+        hour_of_day = transaction_data.get('hour_of_day')
+        if hour_of_day is None:
+            hour_of_day = int(time.time() // 3600) % 24
+        hour_index = int(hour_of_day) % 24
+        out[14] = _HOD_SIN[hour_index]
+        out[15] = _HOD_COS[hour_index]
+
+        return features
     
     def analyze_risk(self, transaction_data: Dict) -> Dict:
         """Main risk analysis method"""
@@ -174,56 +269,169 @@ class RiskAnalyzer:
             logger.error(f"Risk analysis failed: {e}")
             return self._emergency_fallback()
     
+    def analyze_risk_batch(self, transactions: List[Dict]) -> List[Dict]:
+        """Score many transactions with one sklearn call per model.
+
+        All non-blacklisted rows are assembled into a single contiguous
+        feature matrix so the scaler/forest/classifier dispatch overhead is
+        paid once per batch instead of once per transaction; the combination
+        math runs as NumPy array expressions over the whole batch.
+        """
+        if not transactions:
+            return []
+
+        results: List[Optional[Dict]] = [None] * len(transactions)
+
+        # Blacklisted rows short-circuit exactly like the single-item path
+        pending = []
+        for index, transaction_data in enumerate(transactions):
+            blacklist_result = self._check_blacklist(transaction_data)
+            if blacklist_result['is_blacklisted']:
+                results[index] = {
+                    "risk_score": 1.0,
+                    "risk_level": "high",
+                    "is_anomaly": True,
+                    "anomaly_score": -1.0,
+                    "ml_confidence": 1.0,
+                    "risk_factors": [blacklist_result['reason']],
+                    "recommended_action": "block_transaction",
+                    "approved": False,
+                    "blacklist_check": blacklist_result
+                }
+            else:
+                pending.append((index, transaction_data, blacklist_result))
+
+        if not pending:
+            return results
+
+        if not self.is_trained:
+            for index, transaction_data, blacklist_result in pending:
+                results[index] = self._fallback_analysis(transaction_data, blacklist_result)
+            return results
+
+        try:
+            X = np.empty((len(pending), NUM_FEATURES), dtype=FEATURE_DTYPE)
+            for row, (_, transaction_data, _) in enumerate(pending):
+                X[row] = self.extract_features(transaction_data)[0]
+
+            X_scaled = self.feature_scaler.transform(X)
+            anomaly_scores = self.isolation_forest.decision_function(X_scaled)
+            anomalies = anomaly_scores < 0
+            risk_probas = self.risk_classifier.predict_proba(X_scaled)
+
+            if risk_probas.shape[1] > 1:
+                ml_risk_scores = risk_probas[:, 1]
+            else:
+                ml_risk_scores = np.full(len(pending), 0.5)
+            ml_confidences = risk_probas.max(axis=1)
+
+            rule_scores = np.fromiter(
+                (self._rule_based_analysis(tx) for _, tx, _ in pending),
+                dtype=np.float64, count=len(pending)
+            )
+            blacklist_increases = np.fromiter(
+                (bl['risk_score_increase'] for _, _, bl in pending),
+                dtype=np.float64, count=len(pending)
+            )
+
+            combined_scores = np.clip(
+                _W_ML * ml_risk_scores +
+                _W_ANOMALY * np.clip(0.5 - 0.5 * anomaly_scores, 0, None) +
+                _W_RULE * rule_scores +
+                blacklist_increases,
+                0.0, 1.0
+            )
+
+            for row, (index, transaction_data, blacklist_result) in enumerate(pending):
+                combined_score = float(combined_scores[row])
+                risk_level, approved, recommended_action = self._determine_risk_level(combined_score)
+
+                risk_factors = self._identify_risk_factors(transaction_data, X_scaled[row])
+                if blacklist_result['reason']:
+                    risk_factors.append(blacklist_result['reason'])
+
+                results[index] = {
+                    "risk_score": combined_score,
+                    "risk_level": risk_level,
+                    "is_anomaly": bool(anomalies[row]),
+                    "anomaly_score": float(anomaly_scores[row]),
+                    "ml_confidence": float(ml_confidences[row]),
+                    "risk_factors": risk_factors,
+                    "recommended_action": recommended_action,
+                    "approved": approved,
+                    "blacklist_check": blacklist_result
+                }
+
+        except Exception as e:
+            logger.error(f"Batch ML analysis failed: {e}")
+            for index, transaction_data, blacklist_result in pending:
+                if results[index] is None:
+                    results[index] = self._fallback_analysis(transaction_data, blacklist_result)
+
+        return results
+
     def _check_blacklist(self, transaction_data: Dict) -> Dict:
-        """Blacklist check for all addresses in transaction"""
-        results = {
-            "is_blacklisted": False,
-            "reason": None,
-            "source": None,
-            "risk_score_increase": 0.0
-        }
-        
+        """Blacklist check for all addresses in transaction.
+
+        Results keep the plain-dict shape: it is the serialized API
+        contract and callers spread/index it directly, so a slotted class
+        would just add a conversion back to dict at the boundary. The
+        clean case returns the shared module constant with no allocation.
+        """
         # Check user_address if available
         if 'user_address' in transaction_data and transaction_data['user_address']:
             source_chain = transaction_data.get('source_chain', 'ethereum')
             check_result = self.blacklist_checker.check_address(
-                transaction_data['user_address'], 
+                transaction_data['user_address'],
                 source_chain
             )
             if check_result['is_blacklisted']:
                 return check_result
-        
-        return results
+
+        return CLEAN_RESULT
     
     def _ml_analysis(self, transaction_data: Dict, blacklist_result: Dict) -> Dict:
         """ML-powered risk analysis"""
         try:
             # Feature extraction
             features = self.extract_features(transaction_data)
-            
-            # Feature normalization
-            features_scaled = self.feature_scaler.transform(features)
-            
-            # Anomaly detection
+
+            # Feature normalization via the snapshotted parameters, skipping
+            # sklearn's transform() validation overhead for a single row
+            if self._scaler_mean is not None:
+                features_scaled = (features - self._scaler_mean) / self._scaler_scale
+            else:
+                features_scaled = self.feature_scaler.transform(features)
+
+            # Anomaly detection. predict() would re-walk the whole forest
+            # decision_function() just traversed; its -1 label is exactly a
+            # negative decision score, so derive the flag from the sign
             anomaly_score = self.isolation_forest.decision_function(features_scaled)[0]
-            is_anomaly = self.isolation_forest.predict(features_scaled)[0] == -1
-            
-            # Risk classification
-            risk_proba = self.risk_classifier.predict_proba(features_scaled)[0]
-            
-            # Combined risk score
-            ml_risk_score = risk_proba[1] if len(risk_proba) > 1 else 0.5
+            is_anomaly = anomaly_score < 0
+
+            # Risk classification: for one row the logistic regression is
+            # just sigmoid(x @ coef + intercept) over the cached weights
+            if self._lr_weights is not None:
+                ml_risk_score = self._lr_proba(features_scaled[0])
+                ml_confidence = max(ml_risk_score, 1.0 - ml_risk_score)
+            else:
+                risk_proba = self.risk_classifier.predict_proba(features_scaled)[0]
+                ml_risk_score = risk_proba[1] if len(risk_proba) > 1 else 0.5
+                ml_confidence = float(max(risk_proba))
             rule_based_score = self._rule_based_analysis(transaction_data)
-            
-            # Weighted combination
+
+            # Weighted combination. 1 - (score + 1) / 2 simplifies to
+            # 0.5 - 0.5 * score, floored at zero for strongly normal rows
+            anomaly_norm = 0.5 - 0.5 * anomaly_score
+            if anomaly_norm < 0.0:
+                anomaly_norm = 0.0
             combined_score = (
-                0.4 * ml_risk_score +                    # ML prediction
-                0.3 * max(0, (1 - (anomaly_score + 1) / 2)) +  # Anomaly (normalized)
-                0.3 * rule_based_score +                 # Rule-based
-                blacklist_result['risk_score_increase']  # Blacklist penalty
+                _W_ML * ml_risk_score +
+                _W_ANOMALY * anomaly_norm +
+                _W_RULE * rule_based_score +
+                blacklist_result['risk_score_increase']
             )
-            
-            combined_score = min(max(combined_score, 0.0), 1.0)
+            combined_score = 0.0 if combined_score < 0.0 else (1.0 if combined_score > 1.0 else combined_score)
             
             # Risk level determination
             risk_level, approved, recommended_action = self._determine_risk_level(combined_score)
@@ -238,7 +446,7 @@ class RiskAnalyzer:
                 "risk_level": risk_level,
                 "is_anomaly": bool(is_anomaly),
                 "anomaly_score": float(anomaly_score),
-                "ml_confidence": float(max(risk_proba)),
+                "ml_confidence": float(ml_confidence),
                 "risk_factors": risk_factors,
                 "recommended_action": recommended_action,
                 "approved": approved,
@@ -254,22 +462,18 @@ class RiskAnalyzer:
         risk_score = 0.1  # Base risk
         
         amount = float(transaction_data.get('amount_in', 0))
-        
-        # Amount-based risk
-        if amount > 100:
-            risk_score += 0.4
-        elif amount > 10:
-            risk_score += 0.2
-        elif amount > 1:
-            risk_score += 0.1
+
+        # Amount-based risk: one bisect into the shared tier tables instead
+        # of a comparison cascade; bisect_left preserves the strict >
+        risk_score += _AMOUNT_DELTAS[bisect_left(_AMOUNT_THRESHOLDS, amount)]
         
         # Cross-chain risk
         if (transaction_data.get('source_chain') != 
             transaction_data.get('destination_chain')):
             risk_score += 0.1
         
-        # User history risk
-        user_history = transaction_data.get('user_history', {})
+        # User history risk; the sentinel covers absent and empty histories
+        user_history = transaction_data.get('user_history') or EMPTY_USER_HISTORY
         if user_history.get('is_new_user', True):
             risk_score += 0.2
         elif user_history.get('high_risk_ratio', 0) > 0.3:
@@ -319,15 +523,12 @@ class RiskAnalyzer:
         }
     
     def _determine_risk_level(self, risk_score: float) -> Tuple[str, bool, str]:
-        """Determine risk level and recommendations"""
-        if risk_score < 0.3:
-            return "low", True, "proceed"
-        elif risk_score < 0.6:
-            return "medium", True, "proceed_with_monitoring"
-        elif risk_score < 0.8:
-            return "high", False, "manual_review_required"
-        else:
-            return "critical", False, "block_transaction"
+        """Determine risk level and recommendations.
+
+        Delegates to the shared bisect table so both analyzers map scores
+        through the same configured thresholds.
+        """
+        return determine_risk_level(risk_score)
     
     def _identify_risk_factors(self, transaction_data: Dict, features: np.ndarray) -> List[str]:
         """Identify main risk factors"""
@@ -375,8 +576,10 @@ class RiskAnalyzer:
             y = []
             
             for sample in training_data:
+                # Copy out of the shared extraction buffer before it is
+                # overwritten by the next iteration
                 features = self.extract_features(sample)
-                X.append(features[0])
+                X.append(features[0].copy())
                 y.append(1 if sample.get('risk_score', 0) > 0.5 else 0)
             
             X = np.array(X)
@@ -386,7 +589,8 @@ class RiskAnalyzer:
             X_scaled = self.feature_scaler.fit_transform(X)
             self.isolation_forest.fit(X_scaled)
             self.risk_classifier.fit(X_scaled, y)
-            
+            self._cache_model_params()
+
             # Save updated models
             self._save_models()
             
@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, List
 
 
 class RiskAnalyzerBase(ABC):
@@ -7,5 +8,26 @@ class RiskAnalyzerBase(ABC):
 
     @abstractmethod
     def analyze_risk(self, transaction_data: Dict) -> Dict:
-        """Analyze transaction risk and return a result dictionary."""
-        raise NotImplementedError 
\ No newline at end of file
+        """Analyze transaction risk and return a result dictionary.
+
+        The result is a plain dict with the keys risk_score, risk_level,
+        is_anomaly, anomaly_score, ml_confidence, risk_factors,
+        recommended_action, approved and blacklist_check; this shape is
+        serialized directly into API responses, which is why no slotted
+        result class is used. Implementations may return shared or cached
+        objects, so callers must treat results as immutable.
+        """
+        raise NotImplementedError
+
+    def analyze_risk_batch(self, transactions: List[Dict]) -> List[Dict]:
+        """Analyze many transactions; implementations override with
+        vectorized versions, this default simply loops."""
+        return [self.analyze_risk(transaction) for transaction in transactions]
+
+    async def analyze_risk_async(self, transaction_data: Dict) -> Dict:
+        """Run analyze_risk in a worker thread, off the event loop."""
+        return await asyncio.to_thread(self.analyze_risk, transaction_data)
+
+    async def analyze_risk_batch_async(self, transactions: List[Dict]) -> List[Dict]:
+        """Run analyze_risk_batch in a worker thread, off the event loop."""
+        return await asyncio.to_thread(self.analyze_risk_batch, transactions)
\ No newline at end of file
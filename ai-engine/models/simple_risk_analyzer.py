@@ -1,79 +1,276 @@
 """Simple risk analyzer used for initial testing without ML."""
 
 import logging
-from typing import Dict, List
+import threading
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from .blacklist_checker import BlacklistChecker
-from .common_rules import rule_based_score, determine_risk_level
+import numpy as np
+from cachetools import LRUCache
+from .blacklist_checker import BlacklistChecker, CLEAN_RESULT, DEFAULT_BLACKLIST_CHECKER
+from .common_rules import (
+    EMPTY_USER_HISTORY,
+    NORMAL_FACTORS,
+    decode_factors,
+    determine_risk_level,
+    determine_risk_level_batch,
+    rule_based_score_batch,
+    _score_kernel,
+)
 from .risk_analyzer_base import RiskAnalyzerBase
 
 logger = logging.getLogger(__name__)
 
+# Bound for the memoized analysis results; sized for retry/idempotent
+# re-submit traffic rather than the full address space
+RESULT_CACHE_SIZE = 4096
+
+# Bound for cached per-address blacklist verdicts; covers repeat-address
+# workloads (bots, market makers) where amounts vary but addresses repeat
+BLACKLIST_CACHE_SIZE = 8192
+
+# Template for blacklisted transactions: the fixed seven keys are copied
+# and only risk_factors/blacklist_check are patched per hit, so the
+# highest-signal short-circuit does minimal work under blacklist-heavy
+# traffic
+_HIGH_RISK_RESULT = {
+    "risk_score": 1.0,
+    "risk_level": "high",
+    "is_anomaly": True,
+    "anomaly_score": -1.0,
+    "ml_confidence": 1.0,
+    "recommended_action": "block_transaction",
+    "approved": False,
+}
+
+# Template for the emergency fallback response: copied on use so the
+# error path pays one small dict.copy() instead of rebuilding the literal
+_FALLBACK_RESULT = {
+    "risk_score": 0.5,
+    "risk_level": "medium",
+    "is_anomaly": False,
+    "anomaly_score": None,
+    "ml_confidence": 0.0,
+    "risk_factors": ["Risk analysis system error - manual review required"],
+    "recommended_action": "manual_review_required",
+    "approved": False,
+    "blacklist_check": {"is_blacklisted": False, "reason": None}
+}
+
 class SimpleRiskAnalyzer(RiskAnalyzerBase):
-    def __init__(self):
-        self.blacklist_checker = BlacklistChecker()
-    
+    def __init__(self, blacklist_checker: Optional[BlacklistChecker] = None):
+        self.blacklist_checker = blacklist_checker or DEFAULT_BLACKLIST_CHECKER
+
+        # Memoized results for repeated identical payloads (retries,
+        # re-submits); dropped wholesale when the blacklist changes.
+        # LRUCache is not thread-safe and the async entry points score on
+        # worker threads, so every cache access goes through _cache_lock
+        self._result_cache: LRUCache = LRUCache(maxsize=RESULT_CACHE_SIZE)
+        self._bl_cache: LRUCache = LRUCache(maxsize=BLACKLIST_CACHE_SIZE)
+        self._bl_version = self.blacklist_checker.version
+        self._cache_lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(transaction_data: Dict) -> Tuple:
+        """Canonical tuple of every field the scoring pipeline reads.
+
+        Values are kept exact rather than rounded so two payloads only
+        share a result when they genuinely score identically.
+        """
+        user_history = transaction_data.get("user_history") or EMPTY_USER_HISTORY
+        return (
+            transaction_data.get("user_address"),
+            transaction_data.get("source_chain"),
+            transaction_data.get("destination_chain"),
+            float(transaction_data.get("amount_in", 0)),
+            user_history.get("is_new_user", True),
+            user_history.get("high_risk_ratio", 0),
+            user_history.get("avg_transaction_size", 0),
+        )
+
     def analyze_risk(self, transaction_data: Dict) -> Dict:
-        """Perform a simple rule-based risk analysis without ML."""
-        try:
-            # Check user address against the blacklist
-            blacklist_result = self._check_blacklist(transaction_data)
-            
-            # If the address is blacklisted, return high risk immediately
-            if blacklist_result['is_blacklisted']:
-                return {
-                    "risk_score": 1.0,
-                    "risk_level": "high",
-                    "is_anomaly": True,
-                    "anomaly_score": -1.0,
-                    "ml_confidence": 1.0,
-                    "risk_factors": [blacklist_result['reason']],
-                    "recommended_action": "block_transaction",
-                    "approved": False,
-                    "blacklist_check": blacklist_result
-                }
-            
-            # Otherwise run rule-based analysis
-            return self._rule_based_analysis(transaction_data, blacklist_result)
-                
-        except Exception as e:
-            logger.error(f"Risk analysis failed: {e}")
+        """Perform a simple rule-based risk analysis without ML.
+
+        No blanket exception guard: the one malformed input seen in
+        practice (missing amount_in) degrades to the emergency fallback
+        explicitly, while genuine bugs propagate to the API error handler
+        instead of being silently scored as medium risk.
+        """
+        if 'amount_in' not in transaction_data:
+            logger.error("Risk analysis called without amount_in")
             return self._emergency_fallback()
+
+        self._sync_blacklist_version()
+
+        key = self._cache_key(transaction_data)
+        with self._cache_lock:
+            if (cached := self._result_cache.get(key)) is not None:
+                return cached
+
+        # Check user address against the blacklist
+        blacklist_result = self._check_blacklist(transaction_data)
+
+        # If the address is blacklisted, return high risk immediately
+        if blacklist_result['is_blacklisted']:
+            result = _HIGH_RISK_RESULT.copy()
+            result["risk_factors"] = (blacklist_result['reason'],)
+            result["blacklist_check"] = blacklist_result
+        else:
+            # Otherwise run rule-based analysis
+            result = self._rule_based_analysis(transaction_data, blacklist_result)
+
+        with self._cache_lock:
+            self._result_cache[key] = result
+        return result
     
+    def analyze_risk_batch(self, transactions: List[Dict]) -> List[Dict]:
+        """Score many transactions with one pass of array math.
+
+        Blacklisted rows short-circuit exactly like analyze_risk; the rest
+        are packed into parallel NumPy arrays and scored by the vectorized
+        rule kernel, so ufunc dispatch is paid once per batch instead of
+        once per transaction.
+        """
+        if not transactions:
+            return []
+
+        self._sync_blacklist_version()
+
+        results: List[Optional[Dict]] = [None] * len(transactions)
+
+        pending = []
+        for index, transaction_data in enumerate(transactions):
+            blacklist_result = self._check_blacklist(transaction_data)
+            if blacklist_result['is_blacklisted']:
+                result = _HIGH_RISK_RESULT.copy()
+                result["risk_factors"] = (blacklist_result['reason'],)
+                result["blacklist_check"] = blacklist_result
+                results[index] = result
+            else:
+                pending.append((index, transaction_data, blacklist_result))
+
+        if not pending:
+            return results
+
+        count = len(pending)
+        histories = [td.get("user_history") or EMPTY_USER_HISTORY for _, td, _ in pending]
+        amounts = np.fromiter(
+            (float(td.get("amount_in", 0)) for _, td, _ in pending), np.float64, count
+        )
+        is_cross_chain = np.fromiter(
+            (td.get("source_chain") != td.get("destination_chain") for _, td, _ in pending),
+            np.bool_, count
+        )
+        is_new_user = np.fromiter(
+            (h.get("is_new_user", True) for h in histories), np.bool_, count
+        )
+        high_risk_ratio = np.fromiter(
+            (h.get("high_risk_ratio", 0) for h in histories), np.float64, count
+        )
+        avg_transaction_size = np.fromiter(
+            (h.get("avg_transaction_size", 0) for h in histories), np.float64, count
+        )
+
+        scores, masks = rule_based_score_batch(
+            amounts, is_cross_chain, is_new_user, high_risk_ratio, avg_transaction_size
+        )
+        levels = determine_risk_level_batch(scores)
+
+        for row, (index, transaction_data, blacklist_result) in enumerate(pending):
+            score = float(scores[row])
+            factors = decode_factors(int(masks[row])) or NORMAL_FACTORS
+            risk_level, approved, action = levels[row]
+            results[index] = {
+                "risk_score": score,
+                "risk_level": risk_level,
+                "is_anomaly": score > 0.7,
+                "anomaly_score": None,
+                "ml_confidence": 0.7,
+                "risk_factors": factors,
+                "recommended_action": action,
+                "approved": approved,
+                "blacklist_check": blacklist_result,
+            }
+
+        return results
+
+    def _sync_blacklist_version(self) -> None:
+        """Drop memoized verdicts if the blacklist changed under us.
+
+        Called at the top of every entry point so neither the single nor
+        the batch path can keep serving clean verdicts cached before an
+        add_to_blacklist call.
+        """
+        checker_version = self.blacklist_checker.version
+        with self._cache_lock:
+            if checker_version != self._bl_version:
+                self._result_cache.clear()
+                self._bl_cache.clear()
+                self._bl_version = checker_version
+
     def _check_blacklist(self, transaction_data: Dict) -> Dict:
-        """Check the blacklist for the provided addresses."""
-        results = {
-            "is_blacklisted": False,
-            "reason": None,
-            "source": None,
-            "risk_score_increase": 0.0
-        }
-        
-        # Check user_address if provided
-        if 'user_address' in transaction_data and transaction_data['user_address']:
-            source_chain = transaction_data.get('source_chain', 'ethereum')
-            check_result = self.blacklist_checker.check_address(
-                transaction_data['user_address'], 
-                source_chain
-            )
-            if check_result['is_blacklisted']:
+        """Check the blacklist for the provided addresses.
+
+        The no-address and clean cases both resolve to the shared module
+        constant, same as the checker itself; no dict is allocated.
+        """
+        address = transaction_data.get('user_address')
+        if not address:
+            return CLEAN_RESULT
+
+        # Verdicts are cached per (address, chain): one dict probe replaces
+        # normalization, set membership and pattern scanning for repeat
+        # addresses. The raw address is the key on purpose; check_address
+        # normalizes internally and lowering here would re-pay that cost
+        # per hit. check_address returns CLEAN_RESULT itself for clean
+        # addresses, so the cached verdict can be returned as-is
+        source_chain = transaction_data.get('source_chain', 'ethereum')
+        key = (address, source_chain)
+        with self._cache_lock:
+            if (check_result := self._bl_cache.get(key)) is not None:
                 return check_result
-        
-        return results
+        check_result = self.blacklist_checker.check_address(address, source_chain)
+        with self._cache_lock:
+            self._bl_cache[key] = check_result
+        return check_result
     
     def _rule_based_analysis(self, transaction_data: Dict, blacklist_result: Dict) -> Dict:
-        """Calculate risk score using predefined rules."""
-        score, factors = rule_based_score(transaction_data)
+        """Calculate risk score using predefined rules.
+
+        Calls the scoring kernel and factor decode directly rather than
+        through the rule_based_score wrapper, saving a frame on the hot
+        path; the rule logic itself lives only in common_rules.
+        """
+        td_get = transaction_data.get
+        uh_get = (td_get("user_history") or EMPTY_USER_HISTORY).get
+
+        # Exact type check skips float() dispatch for the usual case
+        amount = td_get("amount_in", 0)
+        if type(amount) is not float:
+            amount = float(amount)
+
+        # Interned chain names short-circuit on identity
+        src = td_get("source_chain")
+        dst = td_get("destination_chain")
+
+        score, mask = _score_kernel(
+            amount,
+            (src is not dst) and (src != dst),
+            uh_get("is_new_user", True),
+            uh_get("high_risk_ratio", 0),
+            uh_get("avg_transaction_size", 0),
+        )
+        factors = decode_factors(mask)
+
         score += blacklist_result["risk_score_increase"]
         if blacklist_result.get("reason"):
-            factors.append(blacklist_result["reason"])
+            factors = factors + (blacklist_result["reason"],)
 
         score = min(score, 1.0)
         risk_level, approved, action = determine_risk_level(score)
 
         if not factors:
-            factors = ["Transaction appears normal"]
-        
+            factors = NORMAL_FACTORS
+
         return {
             "risk_score": score,
             "risk_level": risk_level,
@@ -88,14 +285,4 @@ class SimpleRiskAnalyzer(RiskAnalyzerBase):
     
     def _emergency_fallback(self) -> Dict:
         """Emergency fallback used when analysis completely fails."""
-        return {
-            "risk_score": 0.5,
-            "risk_level": "medium",
-            "is_anomaly": False,
-            "anomaly_score": None,
-            "ml_confidence": 0.0,
-            "risk_factors": ["Risk analysis system error - manual review required"],
-            "recommended_action": "manual_review_required",
-            "approved": False,
-            "blacklist_check": {"is_blacklisted": False, "reason": None}
-        }
\ No newline at end of file
+        return _FALLBACK_RESULT.copy()
\ No newline at end of file
@@ -1,5 +1,5 @@
 import sys, os; sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from models.blacklist_checker import BlacklistChecker
+from models.blacklist_checker import BlacklistChecker, _BloomFilter
 
 
 def test_blacklisted_address():
@@ -11,4 +11,18 @@ def test_blacklisted_address():
 def test_clean_address():
     checker = BlacklistChecker()
     result = checker.check_address("0xabcdefabcdefabcdefabcdefabcdefabcdefabcd", "ethereum")
-    assert result["is_blacklisted"] is False 
\ No newline at end of file
+    assert result["is_blacklisted"] is False
+
+
+def test_bloom_prefilter_has_no_false_negatives():
+    items = [f"0x{i:040x}" for i in range(500)]
+    bloom = _BloomFilter(items)
+    assert all(item in bloom for item in items)
+
+
+def test_dynamic_blacklist_addition():
+    checker = BlacklistChecker()
+    address = "0xAbCd111122223333444455556666777788889999"
+    assert checker.check_address(address, "ethereum")["is_blacklisted"] is False
+    assert checker.add_to_blacklist(address, "ethereum", "test addition") is True
+    assert checker.check_address(address, "ethereum")["is_blacklisted"] is True
\ No newline at end of file
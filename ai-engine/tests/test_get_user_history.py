@@ -13,6 +13,34 @@ class DummyConn:
         return self.row
 
 
+class DummyBatchConn:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetch(self, query, user_ids):
+        return self.rows
+
+
+@pytest.mark.asyncio
+async def test_get_user_histories_mixed_users():
+    analyzer = SimpleRiskAnalyzer()
+    service = RiskAnalysisService(analyzer)
+    row = {
+        "user_id": "user1",
+        "total_transactions": 3,
+        "total_volume": 9.0,
+        "avg_transaction_size": 3.0,
+        "last_transaction": datetime.now(),
+        "first_transaction": datetime.now(),
+        "high_risk_count": 0,
+    }
+    conn = DummyBatchConn([row])
+    histories = await service.get_user_histories(conn, ["user1", "user2"])
+    assert histories["user1"].is_new_user is False
+    assert histories["user1"].total_transactions == 3
+    assert histories["user2"].is_new_user is True
+
+
 @pytest.mark.asyncio
 async def test_get_user_history_existing_user():
     analyzer = SimpleRiskAnalyzer()